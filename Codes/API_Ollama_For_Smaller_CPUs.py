@@ -5,7 +5,12 @@ import json
 from llama_index.core import VectorStoreIndex, Settings
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.embeddings.ollama import OllamaEmbedding
-import chromadb
+from model_router import ROUTER, LARGE_MODEL
+from ollama_config import OLLAMA_BASE_URL
+from chroma_config import get_chroma_collection
+from folder_watch import list_documents
+from metrics_panel import show_performance_metrics
+from quantized_index import QuantizedRetriever
 
 # Page Configuration
 st.set_page_config(
@@ -18,27 +23,34 @@ st.title("⚖️ AI Privacy Policy Analyzer")
 st.caption("Analyze legal documents against internal guidelines using Llama 3.")
 
 # System Initialization 
+QUANTIZED_INDEX_DIR = "./chroma_db/quantized_index"
+
 @st.cache_resource
 def initialize_retriever():
     """
     Initializes the embedding model and vector database to retrieve context.
     """
     st.write("Initializing system... (This happens only once)")
-    Settings.embed_model = OllamaEmbedding(model_name="nomic-embed-text")
-    db = chromadb.PersistentClient(path="./chroma_db")
-    chroma_collection = db.get_or_create_collection("privacy_policy_analyzer")
+    Settings.embed_model = OllamaEmbedding(model_name="nomic-embed-text", base_url=OLLAMA_BASE_URL)
+    chroma_collection = get_chroma_collection()
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
     index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
-    return index.as_retriever(similarity_top_k=4)
+    chroma_retriever = index.as_retriever(similarity_top_k=4)
+    # Searches the quantized index whenever one exists, including one built or updated after startup;
+    # Chroma serves queries until then
+    return QuantizedRetriever(
+        QUANTIZED_INDEX_DIR, chroma_collection, Settings.embed_model, similarity_top_k=4,
+        fallback_retriever=chroma_retriever,
+    )
 
 #function to call local Ollama API 
-def query_ollama_api(prompt_text):
+def query_ollama_api(prompt_text, model=LARGE_MODEL):
     """
     Sends a prompt to the Ollama API directly and returns the response.
     """
-    url = "http://localhost:11434/api/generate"
+    url = f"{OLLAMA_BASE_URL}/api/generate"
     payload = {
-        "model": "llama3",
+        "model": model,
         "prompt": prompt_text,
         "stream": True # False if we are capturing the full response at once
     }
@@ -59,7 +71,13 @@ except Exception as e:
 # UI: Document Selection 
 st.subheader("1. Select a Document to Analyze")
 doc_folder = "./Input Files"
-doc_options = [f for f in os.listdir(doc_folder) if f != "policy_guidelines.txt"]
+
+@st.cache_data(ttl=5)
+def get_document_options():
+    # Read from the catalog published by ingest_daemon.py instead of listing the folder on every rerun
+    return [f for f in list_documents(doc_folder) if f != "policy_guidelines.txt"]
+
+doc_options = get_document_options()
 selected_doc_filename = st.selectbox("Choose a document:", options=doc_options, index=0)
 
 if selected_doc_filename:
@@ -98,9 +116,14 @@ if st.button("Analyze Document", type="primary"):
             )
 
             # 3. Call the Ollama API with our new function
-            response = query_ollama_api(final_prompt)
+            route = ROUTER.choose(final_prompt, task="analysis")
+            with ROUTER.track(route):
+                response = query_ollama_api(final_prompt, route.model)
             
             st.subheader("Analysis Results")
             st.info(response)
+            st.caption(route.summary())
         except Exception as e:
-            st.error(f"An error occurred during analysis: {e}", icon="🔥")
\ No newline at end of file
+            st.error(f"An error occurred during analysis: {e}", icon="🔥")
+
+show_performance_metrics()
@@ -1,7 +1,12 @@
 import streamlit as st
 import requests
 import json
-import fitz  # PyMuPDF
+from stream_batching import coalesce_stream
+from metrics_panel import show_performance_metrics
+from model_router import ROUTER, LARGE_MODEL
+from ollama_config import OLLAMA_BASE_URL
+from answer_cache import ANSWER_CACHE
+from upload_spool import read_upload_text
 import time
 import os
 import base64
@@ -55,27 +60,35 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # (All your other helper functions like query_ollama_stream and parse_file remain the same)
-def query_ollama_stream(prompt_text, model='llama3'):
-    url = "http://localhost:11434/api/generate"
+def query_ollama_stream(prompt_text, model=LARGE_MODEL, errors=None):
+    url = f"{OLLAMA_BASE_URL}/api/generate"
     payload = {"model": model, "prompt": prompt_text, "stream": True}
     try:
         with requests.post(url, json=payload, stream=True, timeout=300) as response:
             response.raise_for_status()
+            done = False
             for line in response.iter_lines():
                 if line:
                     chunk = json.loads(line)
+                    # Ollama reports failures part-way through a 200 stream as an "error" line
+                    if chunk.get("error"):
+                        if errors is not None:
+                            errors.append(chunk["error"])
+                        yield f"\n\nError: Ollama failed: {chunk['error']}"
+                        return
                     if chunk.get("response"):
                         yield chunk["response"]
+                    done = done or chunk.get("done", False)
+            if not done and errors is not None:
+                errors.append("The stream ended before Ollama sent its final 'done' line.")
     except requests.exceptions.RequestException as e:
+        if errors is not None:
+            errors.append(e)
         yield f"Error: Could not connect to Ollama. {e}"
 
 def parse_file(uploaded_file):
-    if uploaded_file.type == "text/plain":
-        return uploaded_file.getvalue().decode("utf-8")
-    elif uploaded_file.type == "application/pdf":
-        with fitz.open(stream=uploaded_file.getvalue(), filetype="pdf") as doc:
-            return "".join(page.get_text() for page in doc)
-    return None
+    # Decodes text from the upload's own buffer and spools large PDFs to disk (see upload_spool.py)
+    return read_upload_text(uploaded_file)
 
 # --- Session State Initialization ---
 if "sessions" not in st.session_state:
@@ -144,6 +157,8 @@ current_session = get_current_session()
 for message in current_session["messages"]:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+        if message.get("caption"):
+            st.caption(message["caption"])
 
 # NEW/IMPROVED: Handle the initial "empty" state with custom, larger text
 if not current_session["document_context"]:
@@ -191,7 +206,23 @@ if current_session["document_context"]:
             **User's Question:** {prompt}\n
             **Instruction:** Based ONLY on the document context provided, answer the user's question.
             """
-            response_stream = query_ollama_stream(full_prompt)
-            full_response = st.write_stream(response_stream)
+            cache_key = ANSWER_CACHE.make_key(current_session['document_context'], prompt)
+            full_response = ANSWER_CACHE.get(cache_key)
+            if full_response is not None:
+                caption = "Answered from cache"
+                st.markdown(full_response)
+            else:
+                route = ROUTER.choose(full_prompt, task="chat", question=prompt)
+                errors = []
+                response_stream = coalesce_stream(query_ollama_stream(full_prompt, route.model, errors))
+                with ROUTER.track(route):
+                    full_response = st.write_stream(response_stream)
+                caption = route.summary()
+                # Don't cache answers cut short by a connection error
+                if not errors:
+                    ANSWER_CACHE.put(cache_key, full_response)
+            st.caption(caption)
         
-        current_session["messages"].append({"role": "assistant", "content": full_response})
\ No newline at end of file
+        current_session["messages"].append({"role": "assistant", "content": full_response, "caption": caption})
+
+show_performance_metrics()
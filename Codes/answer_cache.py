@@ -0,0 +1,107 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import requests
+
+from ollama_config import OLLAMA_BASE_URL
+
+# Semantic cache for chat answers. Entries are keyed by a hash of the document
+# context plus the embedding of the question, so "what's the termination notice
+# period?" and "how many days notice to terminate?" on the same document can
+# share one generation. Size is bounded with LRU eviction.
+
+CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_SIZE", "256"))
+CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.92"))
+EMBED_MODEL = "nomic-embed-text"
+
+
+def embed_question(text):
+    """Embeds a question with the local Ollama embedding model. Returns None if Ollama is unreachable."""
+    url = f"{OLLAMA_BASE_URL}/api/embeddings"
+    payload = {"model": EMBED_MODEL, "prompt": text}
+    try:
+        response = requests.post(url, json=payload, timeout=30)
+        response.raise_for_status()
+        return response.json().get("embedding")
+    except requests.exceptions.RequestException:
+        return None
+
+
+def cosine_similarity(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class CacheKey:
+    """Document hash and question embedding for one lookup."""
+
+    def __init__(self, doc_hash, question, embedding):
+        self.doc_hash = doc_hash
+        self.question = question
+        self.embedding = embedding
+
+
+class SemanticAnswerCache:
+    """Thread-safe LRU cache of answers, matched by question similarity within a document."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, threshold=CACHE_THRESHOLD, embed_fn=embed_question):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.embed_fn = embed_fn
+        self._entries = OrderedDict()  # entry id -> (CacheKey, answer)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, document_text, question):
+        doc_hash = hashlib.sha256(document_text.encode("utf-8")).hexdigest()
+        return CacheKey(doc_hash, question, self.embed_fn(question))
+
+    def get(self, key):
+        """Returns the stored answer for the most similar question on the same document, or None."""
+        if key.embedding is None:
+            return None
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id, (entry_key, _) in self._entries.items():
+                if entry_key.doc_hash != key.doc_hash:
+                    continue
+                score = cosine_similarity(entry_key.embedding, key.embedding)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][1]
+
+    def put(self, key, answer):
+        if key.embedding is None or not answer:
+            return
+        with self._lock:
+            self._entries[self._next_id] = (key, answer)
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+ANSWER_CACHE = SemanticAnswerCache()
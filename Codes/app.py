@@ -3,8 +3,12 @@ from llama_index.core import VectorStoreIndex, Settings
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.llms.ollama import Ollama
 from llama_index.embeddings.ollama import OllamaEmbedding
-import chromadb
 import os
+from model_router import ROUTER, LARGE_MODEL
+from ollama_config import OLLAMA_BASE_URL
+from chroma_config import get_chroma_collection
+from folder_watch import list_documents
+from metrics_panel import show_performance_metrics
 
 # Page Configuration
 st.set_page_config(
@@ -25,22 +29,30 @@ def initialize_system():
     """
     st.write("Initializing system... (This happens only once)")
     # Setup LLM and embedding model
-    Settings.llm = Ollama(model="llama3", request_timeout=300.0, temperature=0.1)
-    Settings.embed_model = OllamaEmbedding(model_name="nomic-embed-text")
+    Settings.llm = Ollama(model=LARGE_MODEL, base_url=OLLAMA_BASE_URL, request_timeout=300.0, temperature=0.1)
+    Settings.embed_model = OllamaEmbedding(model_name="nomic-embed-text", base_url=OLLAMA_BASE_URL)
 
     # Connect to the existing ChromaDB collection
-    db = chromadb.PersistentClient(path="./chroma_db")
-    chroma_collection = db.get_or_create_collection("privacy_policy_analyzer")
+    chroma_collection = get_chroma_collection()
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
     
     # Load the index from the vector store
     index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
     
-    # Return a query engine with a higher similarity top_k for more context
-    return index.as_query_engine(similarity_top_k=3)
+    return index
+
+@st.cache_resource
+def get_query_engine(model):
+    """
+    Returns a query engine that answers with the given Ollama model.
+    Cached per model so routing between models doesn't rebuild it on every query.
+    """
+    llm = Ollama(model=model, base_url=OLLAMA_BASE_URL, request_timeout=300.0, temperature=0.1)
+    # Query engine with a higher similarity top_k for more context
+    return index.as_query_engine(similarity_top_k=3, llm=llm)
 
 try:
-    query_engine = initialize_system()
+    index = initialize_system()
 except Exception as e:
     st.error(f"Failed to initialize the system: {e}")
     st.stop()
@@ -50,8 +62,14 @@ st.subheader("1. Select a Document to Analyze")
 
 # Define document options based on files in the "Input Files" directory
 doc_folder = "./Input Files"
-# We exclude the policy guidelines from the dropdown list
-doc_options = [f for f in os.listdir(doc_folder) if f != "policy_guidelines.txt"]
+
+@st.cache_data(ttl=5)
+def get_document_options():
+    # Read from the catalog published by ingest_daemon.py instead of listing the folder on every rerun.
+    # We exclude the policy guidelines from the dropdown list
+    return [f for f in list_documents(doc_folder) if f != "policy_guidelines.txt"]
+
+doc_options = get_document_options()
 
 selected_doc_filename = st.selectbox(
     "Choose a document:",
@@ -94,8 +112,13 @@ if st.button("Analyze Document", type="primary"):
     else:
         with st.spinner("AI is analyzing the document... This may take a moment."):
             try:
-                response = query_engine.query(analysis_prompt)
+                route = ROUTER.choose(analysis_prompt, task="analysis")
+                with ROUTER.track(route):
+                    response = get_query_engine(route.model).query(analysis_prompt)
                 st.subheader("Analysis Results")
                 st.info(str(response))
+                st.caption(route.summary())
             except Exception as e:
-                st.error(f"An error occurred during analysis: {e}")
\ No newline at end of file
+                st.error(f"An error occurred during analysis: {e}")
+
+show_performance_metrics()
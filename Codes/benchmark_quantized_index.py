@@ -0,0 +1,167 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+from llama_index.embeddings.ollama import OllamaEmbedding
+
+from ollama_config import OLLAMA_BASE_URL
+from quantized_index import QuantizedIndex, build_quantized_index
+
+# Compares the quantized two-stage search with the Chroma search that backs
+# `initialize_retriever()` (the same collection, queried for the same top_k).
+# Reports recall@k of the quantized results relative to Chroma's own results,
+# the resident memory (RSS) of a fresh process serving the same queries with
+# each retriever, and the disk footprint of Chroma alone and with the index.
+
+SAMPLE_QUESTIONS = [
+    "What is the governing law of the agreement?",
+    "How many days notice are required to terminate?",
+    "How long do confidentiality obligations last?",
+    "Is there a limitation of liability clause?",
+    "Who owns intellectual property created under the agreement?",
+    "What personal data may be shared with third parties?",
+]
+
+
+def current_rss_bytes():
+    """Resident set size of this process, read from /proc (Linux)."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def directory_bytes(path, exclude=None):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        if exclude is not None:
+            dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != os.path.abspath(exclude)]
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def measure_worker(retriever, db_path, index_dir, queries_path, top_k, candidate_k):
+    """
+    Runs in a fresh process so each retriever's memory is measured on its own.
+    Mirrors what the apps do per query: Chroma's vector search, or the quantized
+    search followed by fetching the matching chunks from Chroma.
+    """
+    queries = np.load(queries_path)
+    chroma_collection = chromadb.PersistentClient(path=db_path).get_or_create_collection("privacy_policy_analyzer")
+    index = QuantizedIndex(index_dir) if retriever == "quantized" else None
+    rss_before = current_rss_bytes()
+    for query in queries:
+        query = [float(x) for x in query]
+        if index is None:
+            chroma_collection.query(query_embeddings=[query], n_results=top_k, include=["documents", "metadatas"])
+        else:
+            ids, _ = index.search(query, top_k, candidate_k)
+            chroma_collection.get(ids=ids, include=["documents", "metadatas"])
+    print(rss_before, current_rss_bytes(), peak_rss_bytes())
+
+
+def measure_rss(retriever, args, queries_path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure-worker", retriever, "--db-path", args.db_path,
+         "--index-dir", args.index_dir, "--top-k", str(args.top_k),
+         "--candidate-k", str(args.candidate_k or 0), "--queries-file", queries_path],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    before, after, peak = (int(x) for x in output[-3:])
+    return {"before": before, "after": after, "peak": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the quantized embedding index.")
+    parser.add_argument("--db-path", default="./chroma_db")
+    parser.add_argument("--index-dir", default="./chroma_db/quantized_index")
+    parser.add_argument("--mode", choices=["int8", "binary"], default="int8")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--candidate-k", type=int, default=None)
+    parser.add_argument("--sample-queries", type=int, default=200,
+                        help="Stored vectors reused as queries, in addition to the sample questions.")
+    parser.add_argument("--skip-build", action="store_true", help="Reuse an existing index in --index-dir.")
+    parser.add_argument("--no-questions", action="store_true",
+                        help="Do not embed SAMPLE_QUESTIONS (runs without a live Ollama).")
+    parser.add_argument("--measure-worker", choices=["chroma", "quantized"], help=argparse.SUPPRESS)
+    parser.add_argument("--queries-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure_worker:
+        measure_worker(args.measure_worker, args.db_path, args.index_dir, args.queries_file,
+                       args.top_k, args.candidate_k or None)
+        return
+
+    db = chromadb.PersistentClient(path=args.db_path)
+    chroma_collection = db.get_or_create_collection("privacy_policy_analyzer")
+
+    if not args.skip_build:
+        print(f"Building {args.mode} index for {chroma_collection.count()} vectors...")
+        start = time.perf_counter()
+        build_quantized_index(chroma_collection, args.index_dir, mode=args.mode)
+        print(f"Built in {time.perf_counter() - start:.1f}s")
+    index = QuantizedIndex(args.index_dir)
+
+    queries = []
+    if not args.no_questions:
+        embed_model = OllamaEmbedding(model_name="nomic-embed-text", base_url=OLLAMA_BASE_URL)
+        queries.extend(embed_model.get_query_embedding(q) for q in SAMPLE_QUESTIONS)
+    if args.sample_queries:
+        rng = np.random.default_rng(0)
+        rows = rng.choice(len(index.ids), size=min(args.sample_queries, len(index.ids)), replace=False)
+        # Jitter the stored vectors slightly so a query is not trivially its own neighbour.
+        noise = rng.normal(scale=0.01, size=(len(rows), index.vectors.shape[1]))
+        queries.extend(np.asarray(index.vectors[np.sort(rows)]) + noise)
+
+    recalls, chroma_times, quantized_times = [], [], []
+    for query in queries:
+        query = [float(x) for x in query]
+        start = time.perf_counter()
+        expected = chroma_collection.query(query_embeddings=[query], n_results=args.top_k, include=[])["ids"][0]
+        chroma_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        found, _ = index.search(query, args.top_k, args.candidate_k)
+        quantized_times.append(time.perf_counter() - start)
+        recalls.append(len(set(expected) & set(found)) / max(len(expected), 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        queries_path = os.path.join(tmp, "queries.npy")
+        np.save(queries_path, np.asarray(queries, dtype=np.float32))
+        rss = {name: measure_rss(name, args, queries_path) for name in ("chroma", "quantized")}
+
+    chroma_disk = directory_bytes(args.db_path, exclude=args.index_dir)
+    index_disk = directory_bytes(args.index_dir)
+
+    mib = 2 ** 20
+    print(f"\nMode: {index.mode}, vectors: {len(index.ids)}, queries: {len(queries)}")
+    print(f"Recall@{args.top_k} vs Chroma: {np.mean(recalls):.3f}")
+    print(f"Chroma latency:    {np.mean(chroma_times) * 1000:.2f} ms/query")
+    print(f"Quantized latency: {np.mean(quantized_times) * 1000:.2f} ms/query")
+    print("\nProcess RSS while serving the queries (fresh process per retriever):")
+    for name, r in rss.items():
+        print(f"  {name:<10} after open {r['before'] / mib:9.1f} MiB, after queries {r['after'] / mib:9.1f} MiB, "
+              f"peak {r['peak'] / mib:9.1f} MiB")
+    saved = rss["chroma"]["peak"] - rss["quantized"]["peak"]
+    print(f"  Peak RSS saved by the quantized retriever: {saved / mib:.1f} MiB")
+    print("\nDisk:")
+    print(f"  Chroma alone:            {chroma_disk / mib:9.1f} MiB")
+    print(f"  Chroma + quantized index: {(chroma_disk + index_disk) / mib:9.1f} MiB "
+          f"(index adds {index_disk / mib:.1f} MiB, including its own float32 copy)")
+
+
+if __name__ == "__main__":
+    main()
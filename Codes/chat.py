@@ -1,6 +1,11 @@
 import streamlit as st
 import requests
 import json
+from stream_batching import coalesce_stream
+from metrics_panel import show_performance_metrics
+from model_router import ROUTER, LARGE_MODEL
+from ollama_config import OLLAMA_BASE_URL
+from answer_cache import ANSWER_CACHE
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -13,11 +18,14 @@ st.title("⚖️ AI Legal Chat")
 st.caption("Paste a legal document below and ask questions about it.")
 
 # --- Reusable Ollama Streaming Function ---
-def query_ollama_stream(prompt_text, model='llama3'):
+def query_ollama_stream(prompt_text, model=LARGE_MODEL, errors=None):
     """
     Sends a prompt to the Ollama API and yields the response in a stream.
+    Connection errors, error lines from Ollama and streams that end without a
+    final "done" line are appended to `errors` if given, so callers can tell a
+    complete answer from a broken one.
     """
-    url = "http://localhost:11434/api/generate"
+    url = f"{OLLAMA_BASE_URL}/api/generate"
     payload = {
         "model": model,
         "prompt": prompt_text,
@@ -26,12 +34,24 @@ def query_ollama_stream(prompt_text, model='llama3'):
     try:
         with requests.post(url, json=payload, stream=True, timeout=300) as response:
             response.raise_for_status()
+            done = False
             for line in response.iter_lines():
                 if line:
                     chunk = json.loads(line)
+                    # Ollama reports failures part-way through a 200 stream as an "error" line
+                    if chunk.get("error"):
+                        if errors is not None:
+                            errors.append(chunk["error"])
+                        yield f"\n\nError from Ollama: {chunk['error']}"
+                        return
                     if chunk.get("response"):
                         yield chunk["response"]
+                    done = done or chunk.get("done", False)
+            if not done and errors is not None:
+                errors.append("The stream ended before Ollama sent its final 'done' line.")
     except requests.exceptions.RequestException as e:
+        if errors is not None:
+            errors.append(e)
         yield f"Error connecting to Ollama: {e}"
 
 # --- Main App UI ---
@@ -48,6 +68,8 @@ if "messages" not in st.session_state:
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+        if message.get("caption"):
+            st.caption(message["caption"])
 
 # 4. Handle new chat input
 if prompt := st.chat_input("Ask a question about the document..."):
@@ -76,8 +98,24 @@ if prompt := st.chat_input("Ask a question about the document..."):
             **Instruction:**
             Based ONLY on the document context provided, please answer the user's question.
             """
-            # Use st.write_stream to display the streaming response
-            response = st.write_stream(query_ollama_stream(full_prompt))
+            # Reuse the answer to a near-identical question on the same document if we have one
+            cache_key = ANSWER_CACHE.make_key(document_text, prompt)
+            response = ANSWER_CACHE.get(cache_key)
+            if response is not None:
+                caption = "Answered from cache"
+                st.markdown(response)
+            else:
+                # Pick the model for this question, then stream the response batched into frames
+                route = ROUTER.choose(full_prompt, task="chat", question=prompt)
+                errors = []
+                with ROUTER.track(route):
+                    response = st.write_stream(coalesce_stream(query_ollama_stream(full_prompt, route.model, errors)))
+                caption = route.summary()
+                if not errors:
+                    ANSWER_CACHE.put(cache_key, response)
+            st.caption(caption)
         
         # Add the complete assistant response to the chat history
-        st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+        st.session_state.messages.append({"role": "assistant", "content": response, "caption": caption})
+
+show_performance_metrics()
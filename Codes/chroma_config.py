@@ -0,0 +1,24 @@
+import os
+
+import chromadb
+
+# Where the apps and the ingest scripts find the vector store. By default each
+# process opens ./chroma_db with an embedded client, which is fine while only
+# ingest.py writes to it. Chroma does not support several processes sharing one
+# embedded store, so to run ingest_daemon.py alongside the apps start a server
+#   chroma run --path ./chroma_db
+# and set CHROMA_HOST (and CHROMA_PORT) for the daemon and every app. They then
+# all go through the server and see each other's inserts and deletes at once.
+
+CHROMA_HOST = os.environ.get("CHROMA_HOST")
+CHROMA_PORT = int(os.environ.get("CHROMA_PORT", "8000"))
+COLLECTION_NAME = "privacy_policy_analyzer"
+
+
+def get_chroma_collection(path="./chroma_db"):
+    """The document collection, through the Chroma server if CHROMA_HOST is set, otherwise from `path`."""
+    if CHROMA_HOST:
+        client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+    else:
+        client = chromadb.PersistentClient(path=path)
+    return client.get_or_create_collection(COLLECTION_NAME)
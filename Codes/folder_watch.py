@@ -0,0 +1,107 @@
+import json
+import os
+import time
+
+# Change detection for the input folder and the document catalog that the
+# ingest daemon publishes. The apps read the catalog instead of listing the
+# folder on every Streamlit rerun.
+
+CATALOG_PATH = "./chroma_db/document_catalog.json"
+# The daemon rewrites the catalog at least this often; an older catalog means it has stopped
+CATALOG_HEARTBEAT_SECONDS = 10.0
+CATALOG_MAX_AGE_SECONDS = 30.0
+
+
+def scan_folder(folder):
+    """Returns {file name: (size, mtime_ns)} for every visible file in the folder."""
+    snapshot = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            stat = entry.stat()
+            snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class ChangeDebouncer:
+    """
+    Compares folder snapshots with what has been ingested and reports a file only
+    after it has stopped changing for `debounce_seconds`, so a burst of writes
+    (a large copy, an export that rewrites the same file) is ingested once.
+    """
+
+    def __init__(self, known, debounce_seconds=2.0):
+        self.known = dict(known)  # file name -> signature that is already ingested
+        self.debounce_seconds = debounce_seconds
+        self._pending = {}  # file name -> (latest signature, time it was first seen)
+
+    def update(self, snapshot, now=None):
+        """Returns (changed, deleted) file names that are settled and ready to process."""
+        now = time.monotonic() if now is None else now
+        names = set(snapshot) | set(self.known)
+        for name in names:
+            signature = snapshot.get(name)
+            if signature == self.known.get(name):
+                self._pending.pop(name, None)
+                continue
+            pending = self._pending.get(name)
+            if pending is None or pending[0] != signature:
+                self._pending[name] = (signature, now)
+
+        changed, deleted = [], []
+        for name, (signature, seen_at) in list(self._pending.items()):
+            if now - seen_at < self.debounce_seconds:
+                continue
+            del self._pending[name]
+            if signature is None:
+                deleted.append(name)
+            else:
+                changed.append(name)
+        return sorted(changed), sorted(deleted)
+
+    def mark_ingested(self, name, signature):
+        """
+        Records a successful add, update or removal. Until this is called the
+        file keeps its previous signature, so a failed attempt is reported again
+        by a later update().
+        """
+        if signature is None:
+            self.known.pop(name, None)
+        else:
+            self.known[name] = signature
+
+
+def write_catalog(documents, path=CATALOG_PATH):
+    """Atomically replaces the catalog so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"updated_at": time.time(), "documents": documents}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_catalog(path=CATALOG_PATH, max_age=None):
+    """
+    Returns {file name: {"size", "mtime_ns", "ingested_at"}}, or None when no
+    catalog exists or, if `max_age` is given, when it is older than that many seconds.
+    """
+    try:
+        with open(path) as f:
+            catalog = json.load(f)
+        if max_age is not None and time.time() - catalog["updated_at"] > max_age:
+            return None
+        return catalog["documents"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def list_documents(doc_folder, path=CATALOG_PATH):
+    """
+    Document names from the catalog, falling back to the folder when there is no
+    catalog or its heartbeat is stale because the daemon has stopped.
+    """
+    documents = read_catalog(path, max_age=CATALOG_MAX_AGE_SECONDS)
+    if documents is None:
+        return sorted(scan_folder(doc_folder))
+    return sorted(documents)
@@ -4,18 +4,20 @@ from llama_index.core.storage.storage_context import StorageContext
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.llms.ollama import Ollama
 from llama_index.embeddings.ollama import OllamaEmbedding
-import chromadb
+from model_router import LARGE_MODEL
+from ollama_config import OLLAMA_BASE_URL
+from chroma_config import get_chroma_collection
+from quantized_index import build_quantized_index
 
 print("Starting data ingestion...")
 
 # Basic Setup
-Settings.llm = Ollama(model="llama3", request_timeout=120.0)
-Settings.embed_model = OllamaEmbedding(model_name="nomic-embed-text")
+Settings.llm = Ollama(model=LARGE_MODEL, base_url=OLLAMA_BASE_URL, request_timeout=120.0)
+Settings.embed_model = OllamaEmbedding(model_name="nomic-embed-text", base_url=OLLAMA_BASE_URL)
 
 # Initialize ChromaDB
 print("Initializing ChromaDB at the project root...")
-db = chromadb.PersistentClient(path="../chroma_db")
-chroma_collection = db.get_or_create_collection("privacy_policy_analyzer")
+chroma_collection = get_chroma_collection(path="../chroma_db")
 vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
 storage_context = StorageContext.from_defaults(vector_store=vector_store)
 
@@ -31,4 +33,10 @@ index = VectorStoreIndex.from_documents(
     documents, storage_context=storage_context
 )
 
+# Optionally build the quantized first-pass index (QUANTIZE_EMBEDDINGS=int8 or binary)
+quantize_mode = os.environ.get("QUANTIZE_EMBEDDINGS")
+if quantize_mode:
+    print(f"Building {quantize_mode} quantized index...")
+    build_quantized_index(chroma_collection, "../chroma_db/quantized_index", mode=quantize_mode)
+
 print("Ingestion Complete!")
\ No newline at end of file
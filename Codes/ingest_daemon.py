@@ -0,0 +1,224 @@
+import argparse
+import os
+import queue
+import threading
+import time
+
+from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, Settings
+from llama_index.vector_stores.chroma import ChromaVectorStore
+from llama_index.embeddings.ollama import OllamaEmbedding
+
+from chroma_config import CHROMA_HOST, get_chroma_collection
+from ollama_config import OLLAMA_BASE_URL
+from folder_watch import (
+    CATALOG_HEARTBEAT_SECONDS, CATALOG_PATH, ChangeDebouncer, read_catalog, scan_folder, write_catalog,
+)
+from quantized_index import build_quantized_index, needs_compaction, read_index_meta, update_quantized_index
+
+# Long-running alternative to `python Codes/ingest.py`. Watches the input folder,
+# waits for bursts of changes to settle, and re-embeds only the files that were
+# added, modified or removed. A bounded queue sits between the watcher and the
+# ingest worker so a large drop of files applies backpressure instead of piling
+# up in memory. After every change the document catalog is republished, and a
+# separate thread rewrites it periodically as a heartbeat so the apps can tell a
+# stopped daemon from an idle (or backlogged) one. An existing quantized index is
+# updated in place for every change (new chunks appended, removed ones
+# tombstoned) and only rebuilt, once the queue drains, when that delta has grown
+# large or an update failed. --quantize also builds one if there is none yet.
+
+
+class IngestDaemon:
+    def __init__(self, input_dir, catalog_path, poll_seconds=1.0, debounce_seconds=2.0, queue_size=64,
+                 quantized_index_dir=None, quantize_mode=None):
+        self.input_dir = input_dir
+        self.catalog_path = catalog_path
+        self.poll_seconds = poll_seconds
+        self.quantized_index_dir = quantized_index_dir
+        self.quantize_mode = quantize_mode
+        # --quantize without an index yet: build one once the worker is idle
+        self._quantized_rebuild = False
+        if quantize_mode and quantized_index_dir:
+            self._quantized_rebuild = read_index_meta(quantized_index_dir) is None
+
+        Settings.embed_model = OllamaEmbedding(model_name="nomic-embed-text", base_url=OLLAMA_BASE_URL)
+        # A Chroma server shared with the apps, so they see every insert and delete (see chroma_config.py)
+        self.chroma_collection = get_chroma_collection()
+        vector_store = ChromaVectorStore(chroma_collection=self.chroma_collection)
+        self.index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
+
+        # Resume from the last published catalog so a restart only picks up what changed meanwhile.
+        # On the first start, adopt what ingest.py already indexed instead of re-embedding the folder.
+        catalog = read_catalog(catalog_path)
+        if catalog is None:
+            catalog = self._catalog_from_chroma(scan_folder(input_dir))
+        self.catalog = catalog
+        # Nothing is published while the catalog is empty, so the apps keep listing the folder
+        self._published = False
+        known = {name: (doc["size"], doc["mtime_ns"]) for name, doc in self.catalog.items()}
+        self.debouncer = ChangeDebouncer(known, debounce_seconds=debounce_seconds)
+        self.work_queue = queue.Queue(maxsize=queue_size)
+        self._in_queue = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _catalog_from_chroma(self, snapshot, batch_size=5000):
+        """
+        Catalog entries for the files that already have chunks in Chroma. A file whose
+        size on disk still matches the indexed one is treated as up to date; any other
+        gets a signature that never matches, so the first scan re-ingests or removes it.
+        """
+        sizes = {}
+        total = self.chroma_collection.count()
+        for offset in range(0, total, batch_size):
+            batch = self.chroma_collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            for metadata in batch["metadatas"]:
+                if metadata and metadata.get("file_name"):
+                    sizes[metadata["file_name"]] = metadata.get("file_size")
+        catalog = {}
+        for name, size in sizes.items():
+            signature = snapshot.get(name)
+            mtime_ns = signature[1] if signature is not None and signature[0] == size else 0
+            catalog[name] = {"size": size, "mtime_ns": mtime_ns, "ingested_at": None}
+        return catalog
+
+    def _file_node_ids(self, name):
+        # SimpleDirectoryReader tags every chunk with the file name it came from
+        return self.chroma_collection.get(where={"file_name": name}, include=[])["ids"]
+
+    def _process(self, name, signature):
+        """Applies one change to Chroma and returns (added node ids, removed node ids)."""
+        old_ids = self._file_node_ids(name)
+        added_ids = []
+        if signature is not None:
+            file_path = os.path.join(self.input_dir, name)
+            documents = SimpleDirectoryReader(input_files=[file_path]).load_data()
+            # Embed and insert the new version first, so the old chunks stay searchable if Ollama fails.
+            # Chunks left by an earlier failed attempt count as old and are replaced on the retry.
+            for document in documents:
+                self.index.insert(document)
+            previous = set(old_ids)
+            added_ids = [node_id for node_id in self._file_node_ids(name) if node_id not in previous]
+        if old_ids:
+            self.chroma_collection.delete(ids=old_ids)
+        if signature is None:
+            print(f"Removed '{name}' from the index.")
+        else:
+            print(f"Ingested '{name}' ({len(added_ids)} chunk(s)).")
+        return added_ids, old_ids
+
+    def _publish_catalog(self):
+        """Writes the catalog; callers hold self._lock."""
+        write_catalog(self.catalog, self.catalog_path)
+        self._published = True
+
+    def _heartbeat(self):
+        # Runs on its own thread so the catalog stays fresh while the main loop is blocked on a full queue
+        while not self._stop.wait(CATALOG_HEARTBEAT_SECONDS):
+            with self._lock:
+                if self._published:
+                    self._publish_catalog()
+
+    def _update_quantized_index(self, added_ids, removed_ids):
+        if not self.quantized_index_dir or read_index_meta(self.quantized_index_dir) is None:
+            return
+        try:
+            meta = update_quantized_index(self.chroma_collection, self.quantized_index_dir, added_ids, removed_ids)
+        except Exception as e:
+            print(f"Failed to update the quantized index, rebuilding it once idle: {e}")
+            self._quantized_rebuild = True
+            return
+        if needs_compaction(meta):
+            self._quantized_rebuild = True
+
+    def _rebuild_quantized_index(self):
+        # Cleared up front so a failing rebuild is retried on the next change, not on every idle poll
+        self._quantized_rebuild = False
+        meta = read_index_meta(self.quantized_index_dir)
+        mode = self.quantize_mode or (meta and meta["mode"])
+        if not mode:
+            return
+        print(f"Rebuilding {mode} quantized index...")
+        try:
+            build_quantized_index(self.chroma_collection, self.quantized_index_dir, mode=mode)
+        except Exception as e:
+            print(f"Failed to rebuild the quantized index: {e}")
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                name, signature = self.work_queue.get(timeout=self.poll_seconds)
+            except queue.Empty:
+                if self._quantized_rebuild:
+                    self._rebuild_quantized_index()
+                continue
+            try:
+                added_ids, removed_ids = self._process(name, signature)
+                self._update_quantized_index(added_ids, removed_ids)
+                with self._lock:
+                    self.debouncer.mark_ingested(name, signature)
+                    if signature is None:
+                        self.catalog.pop(name, None)
+                    else:
+                        self.catalog[name] = {
+                            "size": signature[0], "mtime_ns": signature[1], "ingested_at": time.time(),
+                        }
+                    self._publish_catalog()
+            except Exception as e:
+                # The debouncer still holds the last ingested signature, so a later scan retries this file
+                print(f"Failed to ingest '{name}': {e}")
+            finally:
+                with self._lock:
+                    self._in_queue.discard(name)
+                self.work_queue.task_done()
+
+    def run(self):
+        print(f"Watching '{self.input_dir}' for changes...")
+        with self._lock:
+            if self.catalog:
+                self._publish_catalog()
+        worker = threading.Thread(target=self._worker, daemon=True)
+        worker.start()
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+        try:
+            while not self._stop.is_set():
+                snapshot = scan_folder(self.input_dir)
+                with self._lock:
+                    changed, deleted = self.debouncer.update(snapshot)
+                for name in changed + deleted:
+                    with self._lock:
+                        if name in self._in_queue:
+                            continue
+                        self._in_queue.add(name)
+                    # Blocks while the queue is full, which pauses scanning until the worker catches up
+                    self.work_queue.put((name, snapshot.get(name)))
+                time.sleep(self.poll_seconds)
+        except KeyboardInterrupt:
+            print("Stopping ingest daemon...")
+        finally:
+            self._stop.set()
+            worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch the input folder and ingest new or changed documents.")
+    parser.add_argument("--input-dir", default="./Input Files")
+    parser.add_argument("--catalog-path", default=CATALOG_PATH)
+    parser.add_argument("--poll-seconds", type=float, default=1.0)
+    parser.add_argument("--debounce-seconds", type=float, default=2.0)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--quantized-index-dir", default="./chroma_db/quantized_index")
+    parser.add_argument("--quantize", choices=["int8", "binary"], default=None,
+                        help="Build the quantized index if there is none yet; an existing one is always updated.")
+    args = parser.parse_args()
+    if not CHROMA_HOST:
+        parser.error("CHROMA_HOST is not set. Start a Chroma server with `chroma run --path ./chroma_db` and set "
+                     "CHROMA_HOST for this daemon and the apps; an embedded store is not shared between processes.")
+    IngestDaemon(
+        args.input_dir, args.catalog_path,
+        poll_seconds=args.poll_seconds, debounce_seconds=args.debounce_seconds, queue_size=args.queue_size,
+        quantized_index_dir=args.quantized_index_dir, quantize_mode=args.quantize,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import streamlit as st
+
+from answer_cache import ANSWER_CACHE
+from model_router import ROUTER
+from stream_batching import STREAM_METRICS
+
+# Sidebar expander with this server process's performance counters. Call it at
+# the end of an app script so the numbers include the request that just ran.
+
+
+def show_performance_metrics():
+    with st.sidebar.expander("Performance metrics"):
+        stream = STREAM_METRICS.summary()
+        st.markdown("**Streaming**")
+        st.text(
+            f"Streams: {stream['streams']}\n"
+            f"Tokens / frames: {stream['tokens']} / {stream['frames']} "
+            f"({stream['tokens_per_frame']:.1f} tokens per frame)\n"
+            f"Adapter overhead: {stream['avg_overhead_ms']:.2f} ms per stream\n"
+            f"Time to first frame: {stream['avg_first_frame_ms']:.0f} ms"
+        )
+
+        st.markdown("**Models**")
+        models = ROUTER.summary()
+        if not models:
+            st.caption("No requests served yet.")
+        for model, stats in models.items():
+            st.text(f"{model}: {stats['requests']} requests, {stats['avg_seconds']:.1f}s average")
+
+        st.markdown("**Answer cache**")
+        cache = ANSWER_CACHE.stats()
+        st.text(
+            f"Entries: {cache['entries']}, evictions: {cache['evictions']}\n"
+            f"Hits / misses: {cache['hits']} / {cache['misses']} ({cache['hit_rate']:.0%} hit rate)"
+        )
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Picks the Ollama model for each request. Short factual chat questions and
+# requests made while the host is already busy go to the small model, while
+# full compliance analyses stay on the large one. Rules are checked in order
+# and the first match wins; they can be replaced with a JSON file pointed to by
+# MODEL_ROUTING_RULES, e.g.
+#   [{"task": "chat", "max_question_chars": 80, "model": "small"}]
+# Supported conditions: task, max_prompt_chars, min_prompt_chars,
+# max_question_chars, min_in_flight. "small" and "large" are aliases for the
+# models below; any other value is used as an Ollama model name.
+
+LARGE_MODEL = os.environ.get("OLLAMA_LARGE_MODEL", "llama3")
+SMALL_MODEL = os.environ.get("OLLAMA_SMALL_MODEL", "phi3:mini")
+
+DEFAULT_RULES = [
+    # Full compliance analysis always needs the large model
+    {"task": "analysis", "model": "large"},
+    # Short factual questions over a document that fits the small model's context
+    {"task": "chat", "max_question_chars": 120, "max_prompt_chars": 12000, "model": "small"},
+    # Shed load to the small model when several generations are already running
+    {"task": "chat", "min_in_flight": 2, "max_prompt_chars": 12000, "model": "small"},
+]
+
+
+class RouteDecision:
+    """The model chosen for a request and the rule that chose it."""
+
+    def __init__(self, model, task, reason):
+        self.model = model
+        self.task = task
+        self.reason = reason
+        self.latency = None
+
+    def summary(self):
+        latency = f" in {self.latency:.1f}s" if self.latency is not None else ""
+        return f"Served by {self.model}{latency} ({self.reason})"
+
+
+class ModelRouter:
+    """Chooses a model per request and keeps per-model latency statistics."""
+
+    def __init__(self, rules=None, large_model=LARGE_MODEL, small_model=SMALL_MODEL):
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.aliases = {"large": large_model, "small": small_model}
+        self.default_model = large_model
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {}
+
+    @classmethod
+    def from_env(cls):
+        """Loads the rules from MODEL_ROUTING_RULES when it is set."""
+        rules_path = os.environ.get("MODEL_ROUTING_RULES")
+        if not rules_path:
+            return cls()
+        with open(rules_path) as f:
+            return cls(rules=json.load(f))
+
+    def _matches(self, rule, task, prompt_chars, question_chars, in_flight):
+        checks = [
+            ("task", lambda v: task == v),
+            ("max_prompt_chars", lambda v: prompt_chars <= v),
+            ("min_prompt_chars", lambda v: prompt_chars >= v),
+            ("max_question_chars", lambda v: question_chars <= v),
+            ("min_in_flight", lambda v: in_flight >= v),
+        ]
+        return all(check(rule[key]) for key, check in checks if key in rule)
+
+    def choose(self, prompt_text, task="chat", question=None):
+        """Returns a RouteDecision for the prompt based on the first matching rule."""
+        prompt_chars = len(prompt_text)
+        question_chars = len(question) if question is not None else prompt_chars
+        with self._lock:
+            in_flight = self.in_flight
+        for i, rule in enumerate(self.rules):
+            if self._matches(rule, task, prompt_chars, question_chars, in_flight):
+                model = self.aliases.get(rule["model"], rule["model"])
+                return RouteDecision(model, task, f"rule {i + 1}")
+        return RouteDecision(self.default_model, task, "default")
+
+    @contextmanager
+    def track(self, decision):
+        """Counts the request as in flight and records its latency when it finishes."""
+        with self._lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield decision
+        finally:
+            decision.latency = time.perf_counter() - started
+            with self._lock:
+                self.in_flight -= 1
+                model_stats = self.stats.setdefault(decision.model, {"requests": 0, "total_seconds": 0.0})
+                model_stats["requests"] += 1
+                model_stats["total_seconds"] += decision.latency
+
+    def summary(self):
+        """Requests served and average latency for each model."""
+        with self._lock:
+            return {
+                model: {"requests": s["requests"], "avg_seconds": s["total_seconds"] / s["requests"]}
+                for model, s in self.stats.items()
+            }
+
+
+ROUTER = ModelRouter.from_env()
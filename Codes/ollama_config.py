@@ -0,0 +1,6 @@
+import os
+
+# Connection settings shared by the apps, the ingest scripts and the helpers.
+# Point OLLAMA_BASE_URL at ollama_replay.py to record or replay traffic.
+
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
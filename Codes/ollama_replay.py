@@ -0,0 +1,288 @@
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Record/replay stand-in for Ollama, plus a latency and output regression runner.
+#
+#   record:  python Codes/ollama_replay.py record --fixtures fixtures/ollama
+#   replay:  python Codes/ollama_replay.py replay --fixtures fixtures/ollama --speed 4
+#   regress: python Codes/ollama_replay.py regress --from-fixtures fixtures/ollama --baseline baseline.json \
+#                --target http://localhost:11434
+#
+# Run the apps with OLLAMA_BASE_URL=http://localhost:11435 to send their traffic
+# through the stand-in. In record mode every request is forwarded to the real
+# Ollama and its streamed NDJSON lines are saved together with their arrival
+# times. In replay mode the same lines are served from the fixture at the
+# original pace divided by --speed (0 serves them with no delay).
+#
+# regress sends request bodies; it does not run the Streamlit apps. To cover
+# the apps' real prompts (document context, chat history, retrieved chunks),
+# record a session and pass --from-fixtures so every request the apps made
+# becomes a case. Against the real Ollama that catches latency, prompt token
+# and output regressions for those prompts. Against replay, an identical body
+# always gets its recorded fixture back, so it only checks the stand-in itself.
+# A change to how an app builds its prompts shows up as a new body: re-record
+# and compare the new baseline with the old one.
+
+DEFAULT_UPSTREAM = "http://localhost:11434"
+DEFAULT_PORT = 11435
+
+
+def fixture_key(method, path, body):
+    """Stable name for a request: identical method, path and JSON body map to the same fixture."""
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True) if body else ""
+    except ValueError:
+        canonical = body.decode("utf-8", errors="replace")
+    digest = hashlib.sha256(f"{method} {path} {canonical}".encode("utf-8")).hexdigest()
+    return digest[:24]
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Proxies (record) or serves (replay) Ollama requests. Configured through server attributes."""
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._handle(b"")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self._handle(self.rfile.read(length) if length else b"")
+
+    def _handle(self, body):
+        key = fixture_key(self.command, self.path, body)
+        fixture_path = os.path.join(self.server.fixture_dir, f"{key}.json")
+        if self.server.mode == "record":
+            self._record(body, fixture_path)
+        else:
+            self._replay(fixture_path)
+
+    def _send_headers(self, status, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.end_headers()
+
+    def _record(self, body, fixture_path):
+        request = urllib.request.Request(
+            self.server.upstream + self.path, data=body or None, method=self.command,
+            headers={"Content-Type": self.headers.get("Content-Type", "application/json")},
+        )
+        started = time.perf_counter()
+        chunks = []
+        try:
+            response = urllib.request.urlopen(request, timeout=self.server.upstream_timeout)
+        except urllib.error.HTTPError as e:
+            response = e
+        except urllib.error.URLError as e:
+            self._send_headers(502, "application/json")
+            self.wfile.write(json.dumps({"error": f"Upstream Ollama unreachable: {e.reason}"}).encode())
+            return
+        with response:
+            status = response.status
+            content_type = response.headers.get("Content-Type", "application/json")
+            self._send_headers(status, content_type)
+            # Forward each line as soon as it arrives so streaming clients see the real timing
+            for line in iter(response.readline, b""):
+                chunks.append({"t": time.perf_counter() - started, "data": line.decode("utf-8")})
+                self.wfile.write(line)
+                self.wfile.flush()
+        fixture = {
+            "request": {"method": self.command, "path": self.path, "body": body.decode("utf-8")},
+            "status": status,
+            "content_type": content_type,
+            "chunks": chunks,
+            "total_seconds": time.perf_counter() - started,
+        }
+        with open(fixture_path, "w") as f:
+            json.dump(fixture, f, indent=1)
+
+    def _replay(self, fixture_path):
+        try:
+            with open(fixture_path) as f:
+                fixture = json.load(f)
+        except FileNotFoundError:
+            self._send_headers(404, "application/json")
+            message = f"No recorded fixture for {self.command} {self.path} ({os.path.basename(fixture_path)})"
+            self.wfile.write(json.dumps({"error": message}).encode())
+            return
+        self._send_headers(fixture["status"], fixture["content_type"])
+        started = time.perf_counter()
+        for chunk in fixture["chunks"]:
+            if self.server.speed > 0:
+                delay = chunk["t"] / self.server.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            self.wfile.write(chunk["data"].encode("utf-8"))
+            self.wfile.flush()
+
+
+def make_server(mode, fixture_dir, port=DEFAULT_PORT, upstream=DEFAULT_UPSTREAM, speed=1.0, timeout=600, quiet=False):
+    """Builds the record/replay server; call serve_forever() on the result."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    server = ThreadingHTTPServer(("127.0.0.1", port), ReplayHandler)
+    server.daemon_threads = True
+    server.mode = mode
+    server.fixture_dir = fixture_dir
+    server.upstream = upstream.rstrip("/")
+    server.speed = speed
+    server.upstream_timeout = timeout
+    server.quiet = quiet
+    return server
+
+
+def cases_from_fixtures(fixture_dir):
+    """Turns every recorded POST request into a regression case named after its fixture."""
+    cases = []
+    for file_name in sorted(os.listdir(fixture_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(fixture_dir, file_name)) as f:
+            request = json.load(f).get("request")
+        if not request or request["method"] != "POST" or not request["body"]:
+            continue
+        name = f"{request['path']} {os.path.splitext(file_name)[0]}"
+        cases.append({"name": name, "path": request["path"], "body": json.loads(request["body"])})
+    return cases
+
+
+def run_case(base_url, case, timeout=600):
+    """
+    Sends one request and measures it end to end. Returns latency, time to the
+    first line, the prompt token count Ollama reports and the generated text.
+    """
+    body = json.dumps(case["body"]).encode("utf-8")
+    request = urllib.request.Request(
+        base_url.rstrip("/") + case.get("path", "/api/generate"), data=body, method="POST",
+        headers={"Content-Type": "application/json"},
+    )
+    started = time.perf_counter()
+    first_line_seconds = None
+    output, prompt_tokens = [], None
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for line in iter(response.readline, b""):
+            if first_line_seconds is None:
+                first_line_seconds = time.perf_counter() - started
+            if not line.strip():
+                continue
+            chunk = json.loads(line)
+            # /api/generate streams "response"; /api/chat streams "message.content"
+            output.append(chunk.get("response") or chunk.get("message", {}).get("content", ""))
+            if "prompt_eval_count" in chunk:
+                prompt_tokens = chunk["prompt_eval_count"]
+    return {
+        "latency_seconds": time.perf_counter() - started,
+        "first_line_seconds": first_line_seconds,
+        "prompt_tokens": prompt_tokens,
+        "output": "".join(output),
+    }
+
+
+def compare_to_baseline(result, baseline, latency_tolerance=0.2, min_similarity=0.9):
+    """Lists the ways a result regressed against its baseline; an empty list means it passed."""
+    problems = []
+    limit = baseline["latency_seconds"] * (1 + latency_tolerance)
+    if result["latency_seconds"] > limit:
+        problems.append(f"latency {result['latency_seconds']:.2f}s exceeds {limit:.2f}s")
+    if baseline.get("prompt_tokens") is not None and result["prompt_tokens"] != baseline["prompt_tokens"]:
+        problems.append(f"prompt tokens changed from {baseline['prompt_tokens']} to {result['prompt_tokens']}")
+    similarity = difflib.SequenceMatcher(None, baseline["output"], result["output"]).ratio()
+    if similarity < min_similarity:
+        problems.append(f"output similarity {similarity:.2f} is below {min_similarity:.2f}")
+    return problems
+
+
+def run_regression(cases, baseline_path, base_url, update_baseline=False,
+                   latency_tolerance=0.2, min_similarity=0.9):
+    """
+    Runs every case and checks it against the stored baseline. A case that
+    raises (a connection error, a missing fixture, a bad response) counts as a
+    regression and the rest still run. Returns the number of regressions.
+    """
+    baselines = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baselines = json.load(f)
+
+    failures = 0
+    for case in cases:
+        name = case["name"]
+        try:
+            result = run_case(base_url, case)
+        except Exception as e:
+            print(f"{name}: REGRESSION: request failed: {e}")
+            failures += 1
+            continue
+        print(f"{name}: {result['latency_seconds']:.2f}s, first line {result['first_line_seconds'] or 0:.2f}s, "
+              f"{result['prompt_tokens']} prompt tokens")
+        if update_baseline or name not in baselines:
+            baselines[name] = result
+            print("  baseline recorded")
+            continue
+        problems = compare_to_baseline(result, baselines[name], latency_tolerance, min_similarity)
+        for problem in problems:
+            print(f"  REGRESSION: {problem}")
+        failures += bool(problems)
+
+    with open(baseline_path, "w") as f:
+        json.dump(baselines, f, indent=2)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, replay and regression-test Ollama traffic.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for mode in ("record", "replay"):
+        sub = subparsers.add_parser(mode)
+        sub.add_argument("--fixtures", default="./fixtures/ollama")
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT)
+        if mode == "record":
+            sub.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+        else:
+            sub.add_argument("--speed", type=float, default=1.0,
+                             help="Playback speed multiplier; 0 replays without delays.")
+
+    regress = subparsers.add_parser("regress")
+    sources = regress.add_mutually_exclusive_group(required=True)
+    sources.add_argument("--cases", help='JSON list of {"name", "path", "body"} requests.')
+    sources.add_argument("--from-fixtures", help="Use every request recorded in this fixture folder as a case.")
+    regress.add_argument("--baseline", required=True)
+    regress.add_argument("--target", default=f"http://localhost:{DEFAULT_PORT}")
+    regress.add_argument("--latency-tolerance", type=float, default=0.2)
+    regress.add_argument("--min-similarity", type=float, default=0.9)
+    regress.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "regress":
+        if args.from_fixtures:
+            cases = cases_from_fixtures(args.from_fixtures)
+        else:
+            with open(args.cases) as f:
+                cases = json.load(f)
+        failures = run_regression(cases, args.baseline, args.target, args.update_baseline,
+                                  args.latency_tolerance, args.min_similarity)
+        sys.exit(1 if failures else 0)
+
+    server = make_server(
+        args.command, args.fixtures, port=args.port,
+        upstream=getattr(args, "upstream", DEFAULT_UPSTREAM), speed=getattr(args, "speed", 1.0),
+    )
+    print(f"{args.command.capitalize()}ing Ollama traffic on http://localhost:{args.port} (fixtures: {args.fixtures})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import json
+import os
+
+import numpy as np
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, TextNode
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+
+# Quantized first-pass index over the embeddings stored in ChromaDB.
+# The compact codes (int8 or 1-bit) are scanned to shortlist candidates, and only
+# those candidates are re-ranked with the original float32 vectors, which stay on
+# disk as a memory map and are paged in on demand. Both files are opened with
+# mmap, so every app process on a host shares the same page-cache copy.
+#
+# The index is kept current without full rebuilds: chunks added to Chroma go
+# into a small delta segment (quantized with the base scale) and removed chunks
+# are tombstoned. meta.json names the files of the current generation and is
+# replaced atomically, so readers always load a consistent set. Once the delta
+# and tombstones outgrow DELTA_COMPACT_FRACTION of the base, the index is rebuilt.
+
+QUANTIZATION_MODES = ("int8", "binary")
+SCAN_BLOCK_ROWS = 16384
+DELTA_COMPACT_FRACTION = 0.1
+
+
+def normalize(vectors):
+    """Scales each row to unit length so dot product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(vectors, scale):
+    """Symmetric per-dimension int8 quantization using a precomputed scale."""
+    codes = np.rint(vectors / scale)
+    return np.clip(codes, -127, 127).astype(np.int8)
+
+
+def quantize_binary(vectors):
+    """Keeps only the sign of each dimension, packed 8 dimensions per byte."""
+    return np.packbits(vectors > 0, axis=-1)
+
+
+# Number of set bits for every possible byte value, used for Hamming distances.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def score_codes(codes, query, mode, scale=None):
+    """
+    Approximate similarity between a normalized query and a block of codes.
+    Higher is better for both modes.
+    """
+    if mode == "int8":
+        return codes.astype(np.float32) @ (query * scale)
+    query_bits = quantize_binary(query)
+    hamming = _POPCOUNT[np.bitwise_xor(codes, query_bits)].sum(axis=1, dtype=np.int32)
+    return -hamming.astype(np.float32)
+
+
+def read_index_meta(index_dir):
+    """The index's meta.json, or None when no index has been built."""
+    try:
+        with open(os.path.join(index_dir, "meta.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(index_dir, meta):
+    """Publishes a new generation, then removes the files no generation refers to any more."""
+    tmp_path = os.path.join(index_dir, "meta.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(index_dir, "meta.json"))
+    current = tuple(f"{prefix}." for prefix in (meta["base"], meta["delta"]) if prefix)
+    for name in os.listdir(index_dir):
+        if name.startswith(("base-", "delta-")) and not name.startswith(current):
+            try:
+                # Processes that still map the old files keep their copy until they reload
+                os.remove(os.path.join(index_dir, name))
+            except OSError:
+                pass
+
+
+def _quantize(vectors, mode, scale):
+    return quantize_int8(vectors, scale) if mode == "int8" else quantize_binary(vectors)
+
+
+def build_quantized_index(chroma_collection, index_dir, mode="int8", batch_size=5000):
+    """
+    Reads every embedding from a Chroma collection and writes a new base
+    generation: full-precision vectors, quantized codes, the matching ids and
+    metadata. The previous generation keeps serving until meta.json is replaced.
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}'. Use one of {QUANTIZATION_MODES}.")
+    os.makedirs(index_dir, exist_ok=True)
+    total = chroma_collection.count()
+    if total == 0:
+        raise ValueError("The Chroma collection is empty. Run ingest.py first.")
+    previous = read_index_meta(index_dir)
+    generation = previous["generation"] + 1 if previous else 1
+    base = os.path.join(index_dir, f"base-{generation}")
+
+    ids = []
+    vectors = None
+    # First pass: stream the float32 vectors to disk without holding them all in RAM.
+    for offset in range(0, total, batch_size):
+        batch = chroma_collection.get(include=["embeddings"], limit=batch_size, offset=offset)
+        embeddings = normalize(batch["embeddings"])
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(
+                f"{base}.vectors.npy", mode="w+", dtype=np.float32, shape=(total, embeddings.shape[1]),
+            )
+        vectors[offset:offset + len(embeddings)] = embeddings
+        ids.extend(batch["ids"])
+    vectors.flush()
+
+    # Second pass: derive the codes block by block from the memory-mapped vectors.
+    dim = vectors.shape[1]
+    scale = None
+    if mode == "int8":
+        max_abs = np.zeros(dim, dtype=np.float32)
+        for start in range(0, total, SCAN_BLOCK_ROWS):
+            np.maximum(max_abs, np.abs(vectors[start:start + SCAN_BLOCK_ROWS]).max(axis=0), out=max_abs)
+        max_abs[max_abs == 0] = 1.0
+        scale = max_abs / 127.0
+        code_shape = (total, dim)
+    else:
+        code_shape = (total, (dim + 7) // 8)
+
+    codes = np.lib.format.open_memmap(
+        f"{base}.codes.npy", mode="w+", dtype=np.int8 if mode == "int8" else np.uint8, shape=code_shape,
+    )
+    for start in range(0, total, SCAN_BLOCK_ROWS):
+        block = vectors[start:start + SCAN_BLOCK_ROWS]
+        codes[start:start + len(block)] = _quantize(block, mode, scale)
+    codes.flush()
+    del vectors, codes
+
+    if scale is not None:
+        np.save(f"{base}.scale.npy", scale)
+    with open(f"{base}.ids.json", "w") as f:
+        json.dump(ids, f)
+    _write_meta(index_dir, {
+        "mode": mode, "dim": dim, "count": total, "generation": generation,
+        "base": f"base-{generation}", "delta": None, "delta_ids": [], "deleted": [],
+    })
+    return total
+
+
+def update_quantized_index(chroma_collection, index_dir, added_ids=(), deleted_ids=()):
+    """
+    Adds the embeddings of `added_ids` from Chroma to the delta segment and
+    tombstones `deleted_ids`, touching only the delta. Returns the new meta.
+    """
+    meta = read_index_meta(index_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No quantized index in '{index_dir}'.")
+    deleted = set(deleted_ids)
+    delta_ids = meta["delta_ids"]
+    delta_vectors = np.empty((0, meta["dim"]), dtype=np.float32)
+    if meta["delta"]:
+        delta_vectors = np.load(os.path.join(index_dir, f"{meta['delta']}.vectors.npy"))
+    # Deleted chunks that only live in the delta are dropped; the rest are tombstoned in the base
+    keep = [row for row, node_id in enumerate(delta_ids) if node_id not in deleted]
+    tombstones = set(meta["deleted"]) | (deleted - set(delta_ids))
+    delta_ids = [delta_ids[row] for row in keep]
+    delta_vectors = delta_vectors[keep]
+
+    added = [node_id for node_id in added_ids if node_id not in deleted]
+    if added:
+        records = chroma_collection.get(ids=added, include=["embeddings"])
+        delta_ids = delta_ids + list(records["ids"])
+        delta_vectors = np.concatenate([delta_vectors, normalize(records["embeddings"])])
+
+    generation = meta["generation"] + 1
+    delta = None
+    if delta_ids:
+        delta = f"delta-{generation}"
+        scale = np.load(os.path.join(index_dir, f"{meta['base']}.scale.npy")) if meta["mode"] == "int8" else None
+        np.save(os.path.join(index_dir, f"{delta}.vectors.npy"), delta_vectors)
+        np.save(os.path.join(index_dir, f"{delta}.codes.npy"), _quantize(delta_vectors, meta["mode"], scale))
+    meta.update(generation=generation, delta=delta, delta_ids=delta_ids, deleted=sorted(tombstones))
+    _write_meta(index_dir, meta)
+    return meta
+
+
+def needs_compaction(meta):
+    """True once the delta and tombstones are large enough that a full rebuild pays off."""
+    return len(meta["delta_ids"]) + len(meta["deleted"]) > DELTA_COMPACT_FRACTION * meta["count"]
+
+
+class QuantizedIndex:
+    """Memory-mapped codes and vectors (base plus delta segment) with a two-stage search."""
+
+    def __init__(self, index_dir):
+        meta = read_index_meta(index_dir)
+        if meta is None:
+            raise FileNotFoundError(f"No quantized index in '{index_dir}'.")
+        base = os.path.join(index_dir, meta["base"])
+        with open(f"{base}.ids.json") as f:
+            self.ids = json.load(f) + meta["delta_ids"]
+        self.mode = meta["mode"]
+        self.scale = np.load(f"{base}.scale.npy") if self.mode == "int8" else None
+        # (first row, codes, vectors) for the base and, if any, the delta segment
+        self.segments = [(0, np.load(f"{base}.codes.npy", mmap_mode="r"),
+                          np.load(f"{base}.vectors.npy", mmap_mode="r"))]
+        if meta["delta"]:
+            delta = os.path.join(index_dir, meta["delta"])
+            self.segments.append((meta["count"], np.load(f"{delta}.codes.npy", mmap_mode="r"),
+                                  np.load(f"{delta}.vectors.npy", mmap_mode="r")))
+        self.deleted_rows = None
+        if meta["deleted"]:
+            deleted = set(meta["deleted"])
+            self.deleted_rows = np.fromiter((node_id in deleted for node_id in self.ids), dtype=bool,
+                                            count=len(self.ids))
+
+    def search(self, query_embedding, top_k=4, candidate_k=None):
+        """Returns (ids, scores) for the top_k matches after full-precision re-ranking."""
+        query = normalize(query_embedding)
+        live = len(self.ids) - (int(self.deleted_rows.sum()) if self.deleted_rows is not None else 0)
+        candidate_k = min(candidate_k or top_k * 10, live)
+        top_k = min(top_k, candidate_k)
+        if candidate_k == 0:
+            return [], []
+
+        # Stage 1: scan the compact codes block by block and keep a running shortlist.
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for first_row, codes, _ in self.segments:
+            for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+                scores = score_codes(codes[start:start + SCAN_BLOCK_ROWS], query, self.mode, self.scale)
+                rows = np.arange(first_row + start, first_row + start + len(scores), dtype=np.int64)
+                if self.deleted_rows is not None:
+                    scores[self.deleted_rows[rows]] = -np.inf
+                best_rows = np.concatenate([best_rows, rows])
+                best_scores = np.concatenate([best_scores, scores])
+                if len(best_scores) > candidate_k:
+                    keep = np.argpartition(-best_scores, candidate_k - 1)[:candidate_k]
+                    best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        # Stage 2: exact cosine on just the shortlisted rows, read from disk on demand.
+        candidates = np.sort(best_rows)
+        exact = np.concatenate([
+            vectors[candidates[(candidates >= first_row) & (candidates < first_row + len(vectors))] - first_row]
+            for first_row, _, vectors in self.segments
+        ]) @ query
+        order = np.argsort(-exact)[:top_k]
+        return [self.ids[i] for i in candidates[order]], exact[order].tolist()
+
+    def memory_bytes(self):
+        """Bytes that stay resident for the first pass versus the full-precision store."""
+        return {
+            "codes": sum(codes.nbytes for _, codes, _ in self.segments),
+            "full_precision": sum(vectors.nbytes for _, _, vectors in self.segments),
+        }
+
+
+class QuantizedRetriever(BaseRetriever):
+    """
+    Drop-in replacement for `index.as_retriever()` that searches the quantized
+    index and loads the matching node text from the Chroma collection.
+    Until an index has been built, queries go to `fallback_retriever`; every new
+    generation (an update or a rebuild) is picked up automatically.
+    """
+
+    def __init__(self, index_dir, chroma_collection, embed_model, similarity_top_k=4, candidate_k=None,
+                 fallback_retriever=None):
+        self._index_dir = index_dir
+        self._index = None
+        self._loaded_version = None
+        self._fallback = fallback_retriever
+        self._collection = chroma_collection
+        self._embed_model = embed_model
+        self._top_k = similarity_top_k
+        self._candidate_k = candidate_k
+        super().__init__()
+
+    def _current_index(self):
+        """The loaded index, reloaded when a new generation is published, or None if there is none."""
+        try:
+            version = os.stat(os.path.join(self._index_dir, "meta.json")).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if version != self._loaded_version:
+            try:
+                self._index = QuantizedIndex(self._index_dir)
+            except FileNotFoundError:
+                # Replaced again while loading; keep the previous generation and retry on the next query
+                return self._index
+            self._loaded_version = version
+        return self._index
+
+    def _retrieve(self, query_bundle):
+        index = self._current_index()
+        if index is None:
+            return self._fallback.retrieve(query_bundle) if self._fallback is not None else []
+        query_embedding = self._embed_model.get_query_embedding(query_bundle.query_str)
+        ids, scores = index.search(query_embedding, self._top_k, self._candidate_k)
+        if not ids:
+            return []
+        records = self._collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = dict(zip(records["ids"], zip(records["documents"], records["metadatas"])))
+        results = []
+        for node_id, score in zip(ids, scores):
+            if node_id not in by_id:
+                # Deleted from Chroma but not yet tombstoned in the index
+                continue
+            text, metadata = by_id[node_id]
+            try:
+                node = metadata_dict_to_node(metadata)
+                node.set_content(text or "")
+            except Exception:
+                node = TextNode(id_=node_id, text=text or "", metadata=metadata or {})
+            results.append(NodeWithScore(node=node, score=score))
+        return results
@@ -0,0 +1,104 @@
+import logging
+import os
+import threading
+import time
+
+# Coalesces the token stream from Ollama into larger frames before it reaches
+# `st.write_stream`. Every chunk yielded to Streamlit becomes a websocket delta
+# and a markdown re-render, so sending a frame every ~50 ms instead of every
+# token cuts server work per stream without a visible change in responsiveness.
+
+FLUSH_INTERVAL = float(os.environ.get("STREAM_FLUSH_INTERVAL", "0.05"))  # seconds
+FLUSH_MAX_CHARS = int(os.environ.get("STREAM_FLUSH_MAX_CHARS", "400"))
+
+logger = logging.getLogger(__name__)
+
+
+class StreamMetrics:
+    """Thread-safe counters for all coalesced streams in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.tokens = 0
+        self.frames = 0
+        self.chars = 0
+        self.overhead_seconds = 0.0
+        self.first_frame_seconds = 0.0
+
+    def record(self, tokens, frames, chars, overhead_seconds, first_frame_seconds):
+        with self._lock:
+            self.streams += 1
+            self.tokens += tokens
+            self.frames += frames
+            self.chars += chars
+            self.overhead_seconds += overhead_seconds
+            self.first_frame_seconds += first_frame_seconds
+
+    def summary(self):
+        with self._lock:
+            streams = max(self.streams, 1)
+            return {
+                "streams": self.streams,
+                "tokens": self.tokens,
+                "frames": self.frames,
+                "tokens_per_frame": self.tokens / max(self.frames, 1),
+                "avg_overhead_ms": self.overhead_seconds / streams * 1000,
+                "avg_first_frame_ms": self.first_frame_seconds / streams * 1000,
+            }
+
+
+STREAM_METRICS = StreamMetrics()
+
+
+def coalesce_stream(token_stream, flush_interval=None, max_chars=None, metrics=STREAM_METRICS, clock=time.monotonic):
+    """
+    Wraps a token generator and yields frames of joined tokens.
+    A frame is sent once `flush_interval` seconds have passed since the last one,
+    or once it holds `max_chars` characters. The first token is sent straight
+    away so the answer starts rendering immediately, and whatever is left is
+    flushed when the upstream stream ends.
+    """
+    flush_interval = FLUSH_INTERVAL if flush_interval is None else flush_interval
+    max_chars = FLUSH_MAX_CHARS if max_chars is None else max_chars
+
+    started = clock()
+    first_frame_at = None
+    last_flush = started
+    buffer = []
+    buffered_chars = 0
+    tokens = frames = chars = 0
+    overhead = 0.0
+
+    try:
+        for token in token_stream:
+            work_started = clock()
+            tokens += 1
+            buffer.append(token)
+            buffered_chars += len(token)
+            if first_frame_at is None or buffered_chars >= max_chars or work_started - last_flush >= flush_interval:
+                frame = "".join(buffer)
+                buffer.clear()
+                buffered_chars = 0
+                frames += 1
+                chars += len(frame)
+                last_flush = clock()
+                if first_frame_at is None:
+                    first_frame_at = last_flush
+                overhead += clock() - work_started
+                yield frame
+            else:
+                overhead += clock() - work_started
+        if buffer:
+            frame = "".join(buffer)
+            frames += 1
+            chars += len(frame)
+            yield frame
+    finally:
+        if metrics is not None:
+            first_frame_seconds = (first_frame_at - started) if first_frame_at is not None else 0.0
+            metrics.record(tokens, frames, chars, overhead, first_frame_seconds)
+        logger.info(
+            "stream done: %d tokens in %d frames, adapter overhead %.2f ms",
+            tokens, frames, overhead * 1000,
+        )
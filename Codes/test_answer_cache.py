@@ -0,0 +1,47 @@
+import unittest
+
+from answer_cache import SemanticAnswerCache
+
+# Hand-made embeddings so similarity is predictable without a running Ollama
+EMBEDDINGS = {
+    "what's the termination notice period?": [1.0, 0.0, 0.1],
+    "how many days notice to terminate?": [0.98, 0.0, 0.15],
+    "what is the governing law?": [0.0, 1.0, 0.0],
+}
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SemanticAnswerCache(max_entries=2, threshold=0.95, embed_fn=EMBEDDINGS.get)
+
+    def test_similar_question_hits(self):
+        self.cache.put(self.cache.make_key("nda text", "what's the termination notice period?"), "30 days")
+        self.assertEqual(self.cache.get(self.cache.make_key("nda text", "how many days notice to terminate?")), "30 days")
+        self.assertEqual(self.cache.stats()["hit_rate"], 1.0)
+
+    def test_different_question_or_document_misses(self):
+        self.cache.put(self.cache.make_key("nda text", "what's the termination notice period?"), "30 days")
+        self.assertIsNone(self.cache.get(self.cache.make_key("nda text", "what is the governing law?")))
+        self.assertIsNone(self.cache.get(self.cache.make_key("other text", "how many days notice to terminate?")))
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_lru_eviction(self):
+        first = self.cache.make_key("doc a", "what is the governing law?")
+        self.cache.put(first, "Delaware")
+        self.cache.put(self.cache.make_key("doc b", "what is the governing law?"), "New York")
+        self.cache.get(first)  # doc a becomes most recently used
+        self.cache.put(self.cache.make_key("doc c", "what is the governing law?"), "California")
+        self.assertEqual(self.cache.get(first), "Delaware")
+        self.assertIsNone(self.cache.get(self.cache.make_key("doc b", "what is the governing law?")))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_no_embedding_skips_cache(self):
+        key = self.cache.make_key("nda text", "unknown question")
+        self.cache.put(key, "answer")
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from folder_watch import ChangeDebouncer, list_documents, read_catalog, scan_folder, write_catalog
+
+
+class TestChangeDebouncer(unittest.TestCase):
+
+    def test_new_file_waits_for_debounce(self):
+        debouncer = ChangeDebouncer({}, debounce_seconds=2.0)
+        self.assertEqual(debouncer.update({"nda.txt": (10, 1)}, now=0.0), ([], []))
+        self.assertEqual(debouncer.update({"nda.txt": (10, 1)}, now=1.0), ([], []))
+        self.assertEqual(debouncer.update({"nda.txt": (10, 1)}, now=2.0), (["nda.txt"], []))
+
+    def test_burst_of_writes_resets_timer(self):
+        debouncer = ChangeDebouncer({}, debounce_seconds=2.0)
+        debouncer.update({"nda.txt": (10, 1)}, now=0.0)
+        debouncer.update({"nda.txt": (20, 2)}, now=1.5)
+        self.assertEqual(debouncer.update({"nda.txt": (30, 3)}, now=3.0), ([], []))
+        self.assertEqual(debouncer.update({"nda.txt": (30, 3)}, now=5.0), (["nda.txt"], []))
+
+    def test_only_changed_and_deleted_files_are_reported(self):
+        debouncer = ChangeDebouncer({"a.txt": (1, 1), "b.txt": (2, 2)}, debounce_seconds=0.0)
+        self.assertEqual(debouncer.update({"a.txt": (1, 1), "c.txt": (3, 3)}, now=0.0), (["c.txt"], ["b.txt"]))
+
+    def test_failed_deletion_is_retried(self):
+        """Until mark_ingested succeeds, a deleted file keeps being reported."""
+        debouncer = ChangeDebouncer({"a.txt": (1, 1)}, debounce_seconds=0.0)
+        self.assertEqual(debouncer.update({}, now=0.0), ([], ["a.txt"]))
+        # Removal failed, so nothing is marked; the next scan reports it again
+        self.assertEqual(debouncer.update({}, now=1.0), ([], ["a.txt"]))
+        debouncer.mark_ingested("a.txt", None)
+        self.assertEqual(debouncer.update({}, now=2.0), ([], []))
+
+    def test_ingested_file_is_not_reported_again(self):
+        debouncer = ChangeDebouncer({}, debounce_seconds=0.0)
+        self.assertEqual(debouncer.update({"a.txt": (1, 1)}, now=0.0), (["a.txt"], []))
+        debouncer.mark_ingested("a.txt", (1, 1))
+        self.assertEqual(debouncer.update({"a.txt": (1, 1)}, now=1.0), ([], []))
+
+
+class TestCatalog(unittest.TestCase):
+
+    def test_catalog_round_trip_and_fallback(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "nda.txt"), "w") as f:
+                f.write("text")
+            open(os.path.join(folder, ".hidden"), "w").close()
+            catalog_path = os.path.join(folder, "db", "catalog.json")
+
+            self.assertEqual(list(scan_folder(folder)), ["nda.txt"])
+            self.assertIsNone(read_catalog(catalog_path))
+            self.assertEqual(list_documents(folder, catalog_path), ["nda.txt"])
+
+            write_catalog({"b2b.txt": {"size": 1, "mtime_ns": 1, "ingested_at": 0}}, catalog_path)
+            self.assertEqual(list_documents(folder, catalog_path), ["b2b.txt"])
+
+            # A catalog the daemon stopped refreshing is ignored
+            with open(catalog_path) as f:
+                catalog = json.load(f)
+            catalog["updated_at"] = time.time() - 3600
+            with open(catalog_path, "w") as f:
+                json.dump(catalog, f)
+            self.assertIsNone(read_catalog(catalog_path, max_age=30))
+            self.assertEqual(list_documents(folder, catalog_path), ["nda.txt"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from model_router import ModelRouter
+
+
+class TestModelRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = ModelRouter(large_model="llama3", small_model="phi3:mini")
+
+    def test_short_question_goes_to_small_model(self):
+        route = self.router.choose("document text " * 100, task="chat", question="What is the governing law?")
+        self.assertEqual(route.model, "phi3:mini")
+
+    def test_analysis_stays_on_large_model(self):
+        self.assertEqual(self.router.choose("short", task="analysis").model, "llama3")
+
+    def test_long_document_stays_on_large_model(self):
+        route = self.router.choose("x" * 50000, task="chat", question="What is the governing law?")
+        self.assertEqual(route.model, "llama3")
+        self.assertEqual(route.reason, "default")
+
+    def test_queue_load_sheds_to_small_model(self):
+        question = "Please explain in detail every obligation of the receiving party and how each one is enforced?"
+        self.assertEqual(self.router.choose("doc", task="chat", question=question * 2).model, "llama3")
+        with self.router.track(self.router.choose("doc", task="analysis")):
+            with self.router.track(self.router.choose("doc", task="analysis")):
+                self.assertEqual(self.router.choose("doc", task="chat", question=question * 2).model, "phi3:mini")
+        self.assertEqual(self.router.in_flight, 0)
+
+    def test_custom_rules_and_stats(self):
+        router = ModelRouter(rules=[{"min_prompt_chars": 10, "model": "mistral"}])
+        route = router.choose("a long enough prompt")
+        with router.track(route):
+            pass
+        self.assertEqual(route.model, "mistral")
+        self.assertIsNotNone(route.latency)
+        self.assertIn("mistral", route.summary())
+        self.assertEqual(router.summary()["mistral"]["requests"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
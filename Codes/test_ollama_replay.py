@@ -0,0 +1,110 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ollama_replay import cases_from_fixtures, compare_to_baseline, make_server, run_case, run_regression
+
+TOKENS = ["The ", "notice ", "period ", "is ", "30 days."]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Streams a fixed /api/generate response with a short gap between tokens."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for token in TOKENS:
+            time.sleep(0.02)
+            self.wfile.write(json.dumps({"response": token, "done": False}).encode() + b"\n")
+        self.wfile.write(json.dumps({"response": "", "done": True, "prompt_eval_count": 42}).encode() + b"\n")
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestOllamaReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.fixtures = tempfile.TemporaryDirectory()
+        self.servers = []
+        upstream = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+        self.servers.append(upstream)
+        self.upstream_url = start(upstream)
+        self.case = {"name": "notice", "body": {"model": "llama3", "prompt": "Notice period?", "stream": True}}
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.fixtures.cleanup()
+
+    def start_stand_in(self, mode, speed=1.0):
+        server = make_server(mode, self.fixtures.name, port=0, upstream=self.upstream_url, speed=speed, quiet=True)
+        self.servers.append(server)
+        return start(server)
+
+    def test_record_then_replay(self):
+        recorded = run_case(self.start_stand_in("record"), self.case)
+        self.assertEqual(recorded["output"], "".join(TOKENS))
+        self.assertEqual(recorded["prompt_tokens"], 42)
+
+        replayed = run_case(self.start_stand_in("replay", speed=0), self.case)
+        self.assertEqual(replayed["output"], recorded["output"])
+        self.assertEqual(replayed["prompt_tokens"], 42)
+        # Without pacing the replay is much faster than the ~0.1s recording
+        self.assertLess(replayed["latency_seconds"], recorded["latency_seconds"])
+
+    def test_replay_keeps_original_pace(self):
+        run_case(self.start_stand_in("record"), self.case)
+        replayed = run_case(self.start_stand_in("replay", speed=1.0), self.case)
+        self.assertGreaterEqual(replayed["latency_seconds"], 0.09)
+
+    def test_replay_without_fixture_fails(self):
+        with self.assertRaises(Exception):
+            run_case(self.start_stand_in("replay", speed=0), self.case)
+
+    def test_regression_continues_after_failed_case(self):
+        """A case without a fixture is a regression; the others still run and the baseline is written."""
+        run_case(self.start_stand_in("record"), self.case)
+        replay_url = self.start_stand_in("replay", speed=0)
+        missing = {"name": "missing", "body": {"model": "llama3", "prompt": "Not recorded", "stream": True}}
+        baseline_path = os.path.join(self.fixtures.name, "baseline", "baseline.json")
+        os.makedirs(os.path.dirname(baseline_path))
+        with contextlib.redirect_stdout(io.StringIO()):
+            failures = run_regression([missing, self.case], baseline_path, replay_url)
+        self.assertEqual(failures, 1)
+        with open(baseline_path) as f:
+            self.assertEqual(list(json.load(f)), ["notice"])
+
+    def test_cases_from_fixtures(self):
+        run_case(self.start_stand_in("record"), self.case)
+        cases = cases_from_fixtures(self.fixtures.name)
+        self.assertEqual(len(cases), 1)
+        self.assertEqual(cases[0]["body"], self.case["body"])
+        self.assertEqual(cases[0]["path"], "/api/generate")
+        replayed = run_case(self.start_stand_in("replay", speed=0), cases[0])
+        self.assertEqual(replayed["output"], "".join(TOKENS))
+
+    def test_compare_to_baseline(self):
+        baseline = {"latency_seconds": 1.0, "prompt_tokens": 42, "output": "The notice period is 30 days."}
+        self.assertEqual(compare_to_baseline(dict(baseline, latency_seconds=1.1), baseline), [])
+        problems = compare_to_baseline(
+            {"latency_seconds": 1.5, "prompt_tokens": 80, "output": "Governing law is Delaware."}, baseline)
+        self.assertEqual(len(problems), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from quantized_index import (
+    QuantizedIndex, QuantizedRetriever, build_quantized_index, needs_compaction, update_quantized_index,
+)
+
+
+class FakeCollection:
+    """Just enough of a Chroma collection to build an index from."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.ids = [f"node-{i}" for i in range(len(embeddings))]
+
+    def count(self):
+        return len(self.ids)
+
+    def add(self, embeddings):
+        start = len(self.ids)
+        self.embeddings = np.concatenate([self.embeddings, embeddings])
+        self.ids += [f"node-{i}" for i in range(start, start + len(embeddings))]
+        return self.ids[start:]
+
+    def get(self, ids=None, include=None, limit=None, offset=0):
+        if ids is not None:
+            found = [i for i in ids if i in self.ids]
+            rows = [self.ids.index(i) for i in found]
+            return {"ids": found, "documents": [f"text of {i}" for i in found], "metadatas": [{} for _ in found],
+                    "embeddings": self.embeddings[rows].tolist()}
+        end = offset + limit
+        return {"ids": self.ids[offset:end], "embeddings": self.embeddings[offset:end].tolist()}
+
+
+class FakeEmbedModel:
+    def __init__(self, vector):
+        self.vector = vector
+
+    def get_query_embedding(self, query_str):
+        return self.vector
+
+
+class FakeQuery:
+    query_str = "notice period"
+
+
+class TestQuantizedIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.embeddings = rng.normal(size=(500, 64)).astype(np.float32)
+        self.collection = FakeCollection(self.embeddings)
+
+    def exact_top_k(self, query, k):
+        vectors = self.embeddings / np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        return {f"node-{i}" for i in np.argsort(-(vectors @ query))[:k]}
+
+    def check_recall(self, mode, minimum):
+        with tempfile.TemporaryDirectory() as index_dir:
+            build_quantized_index(self.collection, index_dir, mode=mode, batch_size=128)
+            index = QuantizedIndex(index_dir)
+            hits = 0
+            for row in range(0, 500, 25):
+                query = self.embeddings[row] / np.linalg.norm(self.embeddings[row])
+                found, scores = index.search(query, top_k=4, candidate_k=40)
+                self.assertEqual(found[0], f"node-{row}")
+                self.assertEqual(scores, sorted(scores, reverse=True))
+                hits += len(set(found) & self.exact_top_k(query, 4))
+            self.assertGreaterEqual(hits / (20 * 4), minimum)
+            return index.memory_bytes()
+
+    def test_int8_recall_and_memory(self):
+        """int8 codes use a quarter of the float32 memory and keep the exact ranking."""
+        memory = self.check_recall("int8", 0.95)
+        self.assertEqual(memory["codes"] * 4, memory["full_precision"])
+
+    def test_binary_recall_and_memory(self):
+        """Binary codes use 1/32 of the float32 memory; re-ranking recovers most of the recall."""
+        memory = self.check_recall("binary", 0.75)
+        self.assertEqual(memory["codes"] * 32, memory["full_precision"])
+
+    def test_retriever_skips_deleted_chunks(self):
+        """Chunks removed from Chroma after the index was built are skipped, not a KeyError."""
+        with tempfile.TemporaryDirectory() as index_dir:
+            build_quantized_index(self.collection, index_dir, batch_size=128)
+            retriever = QuantizedRetriever(index_dir, self.collection, FakeEmbedModel(self.embeddings[7]))
+            self.collection.ids[7] = "deleted"
+            results = retriever._retrieve(FakeQuery())
+            self.assertEqual(len(results), 3)
+            self.assertNotIn("node-7", [r.node.id_ for r in results])
+
+    def test_retriever_falls_back_until_index_is_built(self):
+        """Without an index queries go to the fallback; an index built later is picked up."""
+        class FallbackRetriever:
+            def retrieve(self, query_bundle):
+                return ["from chroma"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index_dir = os.path.join(tmp, "quantized_index")
+            retriever = QuantizedRetriever(index_dir, self.collection, FakeEmbedModel(self.embeddings[3]),
+                                           fallback_retriever=FallbackRetriever())
+            self.assertEqual(retriever._retrieve(FakeQuery()), ["from chroma"])
+            build_quantized_index(self.collection, index_dir, batch_size=128)
+            self.assertEqual(retriever._retrieve(FakeQuery())[0].node.id_, "node-3")
+
+    def test_incremental_update(self):
+        """Added chunks become searchable and deleted ones disappear without a rebuild."""
+        with tempfile.TemporaryDirectory() as index_dir:
+            build_quantized_index(self.collection, index_dir, batch_size=128)
+            base_files = {name for name in os.listdir(index_dir) if name.startswith("base-")}
+            new_vectors = np.random.default_rng(7).normal(size=(5, 64)).astype(np.float32)
+            added = self.collection.add(new_vectors)
+            retriever = QuantizedRetriever(index_dir, self.collection, FakeEmbedModel(new_vectors[2]))
+            self.assertNotEqual(retriever._retrieve(FakeQuery())[0].node.id_, added[2])
+
+            meta = update_quantized_index(self.collection, index_dir, added_ids=added, deleted_ids=["node-3"])
+            self.assertEqual(base_files, {name for name in os.listdir(index_dir) if name.startswith("base-")})
+            self.assertEqual(meta["delta_ids"], added)
+            self.assertFalse(needs_compaction(meta))
+            # The retriever reloads the new generation on its next query
+            self.assertEqual(retriever._retrieve(FakeQuery())[0].node.id_, added[2])
+
+            index = QuantizedIndex(index_dir)
+            query = self.embeddings[3] / np.linalg.norm(self.embeddings[3])
+            self.assertNotIn("node-3", index.search(query, top_k=4)[0])
+            # Deleting a chunk that only lives in the delta drops it from the delta
+            meta = update_quantized_index(self.collection, index_dir, deleted_ids=[added[0]])
+            self.assertEqual(meta["delta_ids"], added[1:])
+            self.assertEqual(meta["deleted"], ["node-3"])
+            self.assertEqual(len(QuantizedIndex(index_dir).ids), 504)
+
+    def test_compaction_threshold(self):
+        with tempfile.TemporaryDirectory() as index_dir:
+            build_quantized_index(self.collection, index_dir, batch_size=128)
+            meta = update_quantized_index(self.collection, index_dir, deleted_ids=self.collection.ids[:60])
+            self.assertTrue(needs_compaction(meta))
+            build_quantized_index(self.collection, index_dir, batch_size=128)
+            # Only the new generation's files are left behind
+            self.assertEqual(sorted(os.listdir(index_dir)), [
+                "base-3.codes.npy", "base-3.ids.json", "base-3.scale.npy", "base-3.vectors.npy", "meta.json",
+            ])
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            build_quantized_index(self.collection, tempfile.gettempdir(), mode="float16")
+
+
+if __name__ == '__main__':
+    unittest.main()
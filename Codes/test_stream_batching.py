@@ -0,0 +1,53 @@
+import unittest
+
+from stream_batching import StreamMetrics, coalesce_stream
+
+
+class FakeClock:
+    """Advances by a fixed step on every call."""
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class TestCoalesceStream(unittest.TestCase):
+
+    def test_output_is_unchanged(self):
+        """Joining the frames gives back exactly the original text."""
+        tokens = [f"word{i} " for i in range(200)]
+        frames = list(coalesce_stream(iter(tokens), flush_interval=1.0, max_chars=50, metrics=None))
+        self.assertEqual("".join(frames), "".join(tokens))
+        self.assertLess(len(frames), len(tokens))
+
+    def test_first_token_is_sent_immediately(self):
+        frames = list(coalesce_stream(iter(["Hello", " world"]), flush_interval=10.0, max_chars=1000, metrics=None))
+        self.assertEqual(frames, ["Hello", " world"])
+
+    def test_size_limit_flushes(self):
+        frames = list(coalesce_stream(iter(["a"] * 10), flush_interval=10.0, max_chars=3, metrics=None))
+        self.assertEqual(frames, ["a", "aaa", "aaa", "aaa"])
+
+    def test_interval_flushes(self):
+        """With a clock that moves 0.01s per call, a 0.05s interval batches a few tokens per frame."""
+        frames = list(coalesce_stream(iter(["x"] * 30), flush_interval=0.05, max_chars=1000,
+                                      metrics=None, clock=FakeClock(0.01)))
+        self.assertEqual("".join(frames), "x" * 30)
+        self.assertTrue(1 < len(frames) < 30)
+
+    def test_metrics(self):
+        metrics = StreamMetrics()
+        list(coalesce_stream(iter(["ab"] * 6), flush_interval=10.0, max_chars=4, metrics=metrics))
+        summary = metrics.summary()
+        self.assertEqual(summary["streams"], 1)
+        self.assertEqual(summary["tokens"], 6)
+        self.assertEqual(summary["frames"], 4)
+        self.assertEqual(metrics.chars, 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
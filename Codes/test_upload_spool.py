@@ -0,0 +1,72 @@
+import io
+import tracemalloc
+import unittest
+
+import fitz  # PyMuPDF
+
+import upload_spool
+from upload_spool import iter_upload_text, read_upload_text
+
+
+class FakeUpload(io.BytesIO):
+    """Mirrors Streamlit's UploadedFile, which is a BytesIO with name, type and size."""
+
+    def __init__(self, data, name, type):
+        super().__init__(data)
+        self.name = name
+        self.type = type
+        self.size = len(data)
+
+
+def make_pdf(pages):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Clause {i}")
+    return doc.tobytes()
+
+
+class TestUploadSpool(unittest.TestCase):
+
+    def test_text_decoded_in_chunks(self):
+        """Multi-byte characters split across chunk boundaries are decoded correctly."""
+        text = "Confidentialité — 30 days ✓\n" * 1000
+        upload = FakeUpload(text.encode("utf-8"), "nda.txt", "text/plain")
+        pieces = list(iter_upload_text(upload, chunk_size=7))
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(pieces), text)
+
+    def test_pdf_in_memory_and_spooled(self):
+        upload = FakeUpload(make_pdf(3), "nda.pdf", "application/pdf")
+        in_memory = list(iter_upload_text(upload))
+        threshold = upload_spool.SPOOL_THRESHOLD_BYTES
+        upload_spool.SPOOL_THRESHOLD_BYTES = 0
+        try:
+            spooled = list(iter_upload_text(upload))
+        finally:
+            upload_spool.SPOOL_THRESHOLD_BYTES = threshold
+        self.assertEqual(len(spooled), 3)
+        self.assertEqual(spooled, in_memory)
+        self.assertIn("Clause 2", spooled[2])
+
+    def test_text_read_without_extra_copies(self):
+        """Reading a text upload allocates about one copy of it and keeps nothing afterwards."""
+        data = b"The receiving party shall keep all information confidential.\n" * 100_000
+        upload = FakeUpload(data, "nda.txt", "text/plain")
+        tracemalloc.start()
+        try:
+            text = read_upload_text(upload)
+            _, peak = tracemalloc.get_traced_memory()
+            self.assertEqual(len(text), len(data))
+            del text
+            retained, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, len(data) * 1.5)
+        self.assertLess(retained, len(data) * 0.1)
+
+    def test_unsupported_type(self):
+        self.assertIsNone(read_upload_text(FakeUpload(b"x", "a.docx", "application/msword")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,12 @@ import streamlit as st
 import os
 import requests
 import json
-import fitz  # PyMuPDF
+from stream_batching import coalesce_stream
+from metrics_panel import show_performance_metrics
+from model_router import ROUTER, LARGE_MODEL
+from ollama_config import OLLAMA_BASE_URL
+from answer_cache import ANSWER_CACHE
+from upload_spool import read_upload_text
 import time
 
 # --- App Configuration ---
@@ -36,29 +41,36 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Helper Functions ---
-def query_ollama_stream(prompt_text, model='llama3'):
-    """Streams the response from the local Ollama instance."""
-    url = "http://localhost:11434/api/generate"
+def query_ollama_stream(prompt_text, model=LARGE_MODEL, errors=None):
+    """Streams the response from the local Ollama instance. Anything that leaves the answer incomplete is appended to `errors`."""
+    url = f"{OLLAMA_BASE_URL}/api/generate"
     payload = {"model": model, "prompt": prompt_text, "stream": True}
     try:
         with requests.post(url, json=payload, stream=True, timeout=600) as response:
             response.raise_for_status()
+            done = False
             for line in response.iter_lines():
                 if line:
                     chunk = json.loads(line)
+                    # Ollama reports failures part-way through a 200 stream as an "error" line
+                    if chunk.get("error"):
+                        if errors is not None:
+                            errors.append(chunk["error"])
+                        yield f"\n\nOllama Error: {chunk['error']}"
+                        return
                     if chunk.get("response"):
                         yield chunk["response"]
+                    done = done or chunk.get("done", False)
+            if not done and errors is not None:
+                errors.append("The stream ended before Ollama sent its final 'done' line.")
     except requests.exceptions.RequestException as e:
+        if errors is not None:
+            errors.append(e)
         yield f"Connection Error: Please ensure 'ollama serve' is running. ({e})"
 
 def parse_file(uploaded_file):
-    """Extracts text from PDF or TXT files."""
-    if uploaded_file.type == "text/plain":
-        return uploaded_file.getvalue().decode("utf-8")
-    elif uploaded_file.type == "application/pdf":
-        with fitz.open(stream=uploaded_file.getvalue(), filetype="pdf") as doc:
-            return "".join(page.get_text() for page in doc)
-    return None
+    """Extracts text from PDF or TXT files without extra full-size copies of the upload."""
+    return read_upload_text(uploaded_file)
 
 # --- Session State Initialization ---
 if "sessions" not in st.session_state:
@@ -129,6 +141,8 @@ else:
     for msg in current_session["messages"]:
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
+            if msg.get("caption"):
+                st.caption(msg["caption"])
 
 # --- Native, Uninterrupted Chat Input ---
 if prompt := st.chat_input("Message Aegis..."):
@@ -156,12 +170,28 @@ if prompt := st.chat_input("Message Aegis..."):
 
         final_prompt = f"{compiled_context}\n\nUser Question: {prompt}\n\nInstruction: Answer the user's question based strictly on the provided context documents if they exist."
         
-        # 3. Show spinner while Ollama evaluates the context
-        with st.spinner("Aegis is analyzing documents..."):
-            stream = query_ollama_stream(final_prompt)
-        
-        # 4. Stream the output reliably
-        response = st.write_stream(stream)
+        # 3. Reuse the answer to a near-identical question on the same documents if we have one
+        cache_key = ANSWER_CACHE.make_key(compiled_context, prompt)
+        response = ANSWER_CACHE.get(cache_key)
+        if response is not None:
+            caption = "Answered from cache"
+            st.markdown(response)
+        else:
+            # Show spinner while Ollama evaluates the context
+            route = ROUTER.choose(final_prompt, task="chat", question=prompt)
+            errors = []
+            with st.spinner("Aegis is analyzing documents..."):
+                stream = coalesce_stream(query_ollama_stream(final_prompt, route.model, errors))
+            
+            # 4. Stream the output reliably
+            with ROUTER.track(route):
+                response = st.write_stream(stream)
+            caption = route.summary()
+            if not errors:
+                ANSWER_CACHE.put(cache_key, response)
+        st.caption(caption)
         
         # 5. Save to history
-        current_session["messages"].append({"role": "assistant", "content": response})
\ No newline at end of file
+        current_session["messages"].append({"role": "assistant", "content": response, "caption": caption})
+
+show_performance_metrics()
@@ -0,0 +1,79 @@
+import codecs
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+# Memory-conscious reading of uploaded files. Streamlit already holds each upload
+# in memory as a BytesIO, whose getvalue() shares that buffer rather than copying
+# it (getbuffer() would force a private copy), so text is decoded straight from
+# it. Large PDFs are spooled to a temp file and opened from disk, so MuPDF loads
+# pages on demand rather than parsing an in-memory copy.
+
+READ_CHUNK_BYTES = 1024 * 1024
+SPOOL_THRESHOLD_BYTES = int(os.environ.get("UPLOAD_SPOOL_THRESHOLD", str(8 * 1024 * 1024)))
+
+
+@contextmanager
+def spooled_upload(uploaded_file):
+    """Copies the upload to a temp file chunk by chunk and yields its path; the file is removed afterwards."""
+    suffix = os.path.splitext(uploaded_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spool:
+        uploaded_file.seek(0)
+        shutil.copyfileobj(uploaded_file, spool, READ_CHUNK_BYTES)
+        uploaded_file.seek(0)
+    try:
+        yield spool.name
+    finally:
+        os.remove(spool.name)
+
+
+def _iter_pdf_pages(uploaded_file):
+    if uploaded_file.size > SPOOL_THRESHOLD_BYTES:
+        with spooled_upload(uploaded_file) as path, fitz.open(path) as doc:
+            for page in doc:
+                yield page.get_text()
+    else:
+        with fitz.open(stream=uploaded_file.getvalue(), filetype="pdf") as doc:
+            for page in doc:
+                yield page.get_text()
+
+
+def iter_upload_text(uploaded_file, chunk_size=READ_CHUNK_BYTES):
+    """
+    Yields the text of a TXT or PDF upload piece by piece (decoded chunks or pages),
+    so callers can chunk/embed it incrementally.
+    """
+    if uploaded_file.type == "text/plain":
+        data = memoryview(uploaded_file.getvalue())
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for start in range(0, len(data), chunk_size):
+            text = decoder.decode(data[start:start + chunk_size])
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+    elif uploaded_file.type == "application/pdf":
+        yield from _iter_pdf_pages(uploaded_file)
+    else:
+        raise ValueError(f"Unsupported file type: {uploaded_file.type}")
+
+
+def read_upload_text(uploaded_file):
+    """
+    Full text of a TXT or PDF upload, or None for other file types.
+    Text is decoded in one pass from the upload's own buffer; PDF pages are
+    written into a single StringIO instead of being collected in a list.
+    """
+    if uploaded_file.type == "text/plain":
+        return str(memoryview(uploaded_file.getvalue()), "utf-8")
+    if uploaded_file.type == "application/pdf":
+        text = io.StringIO()
+        for page_text in _iter_pdf_pages(uploaded_file):
+            text.write(page_text)
+        return text.getvalue()
+    return None